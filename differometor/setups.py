@@ -1,8 +1,76 @@
 import numpy as np
 import jax.numpy as jnp
 from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
 from differometor.components import DEFAULT_PROPERTIES, PARAMETER_BOUNDS
-from differometor.utils import sigmoid_bounding, set_value
+from differometor.utils import set_value
+
+
+class _Record:
+    """
+    Mapping-style access to the fields of node and edge records, for code written against the 
+    former dict records (data["target"], "port" in data, data.get(...), keys(), items(), dict(data)).
+    Unset (None) fields behave like missing keys. Unlike a dict, only the record's own fields 
+    can be assigned; any other key raises a KeyError.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        value = getattr(self, key, None)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(f"'{key}' is not a field of {type(self).__name__}.")
+
+    def __contains__(self, key):
+        return getattr(self, key, None) is not None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def keys(self):
+        return [key for key in self.__slots__ if getattr(self, key) is not None]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+
+@dataclass(slots=True)
+class NodeRecord(_Record):
+    component: str
+    properties: dict
+    target: Optional[str] = None
+    target_property: Optional[str] = None
+    port: Optional[str] = None
+    direction: Optional[str] = None
+    auxiliary: Optional[bool] = None
+    detector1: Optional[str] = None
+    detector2: Optional[str] = None
+
+
+@dataclass(slots=True)
+class EdgeRecord(_Record):
+    properties: dict
+    source_port: str = "right"
+    target_port: str = "left"
+    # free-form label set by setup generators, e.g. ("hspace", 2) for UIFO grid spaces
+    tag: Optional[tuple] = None
 
 
 class Nodes:
@@ -26,11 +94,14 @@ class Nodes:
 
 
 class Edges:
-    def __init__(self, edges):
+    def __init__(self, edges, triples):
         self._edges = edges
+        # (source, target) -> (source, target, data), kept in sync by Setup.space so that
+        # iterating does not have to repack every item
+        self._triples = triples
 
     def __iter__(self):
-        return iter((src, tgt, data) for (src, tgt), data in self._edges.items())
+        return iter(self._triples.values())
     
     def __getitem__(self, edge):
         source, target = edge.split('_')
@@ -41,9 +112,13 @@ class Edges:
         
     def __call__(self, data=True):
         if data:
-            return iter((src, tgt, data) for (src, tgt), data in self._edges.items())
+            return iter(self._triples.values())
         else:
-            return iter((src, tgt) for (src, tgt) in self._edges)
+            return iter(self._edges)
+
+
+# component properties that signals can modulate directly, e.g. target="l0_amplitude"
+_TARGET_PROPERTIES = frozenset({'amplitude', 'frequency'})
 
 
 class Setup:
@@ -51,8 +126,9 @@ class Setup:
         self.parameters = []
         self._nodes = {}
         self._edges = {}
+        self._edge_triples = {}
         self.nodes = Nodes(self._nodes)
-        self.edges = Edges(self._edges)        
+        self.edges = Edges(self._edges, self._edge_triples)
 
         self.default_properties = {
             'frequency': {'frequency': 1},
@@ -69,6 +145,8 @@ class Setup:
             'nothing': {},
             'directional_beamsplitter': {},
         }
+        # precomputed once, so that add() and space() extend the parameters from a fixed tuple of property names
+        self._default_prop_names = {c: tuple(d.keys()) for c, d in self.default_properties.items()}
 
     def add(
             self, 
@@ -85,103 +163,78 @@ class Setup:
         if '_' in name:
             raise ValueError(f"Node name '{name}' cannot contain underscores. Use '-' instead.")
         
+        try:
+            default_names = self._default_prop_names[component]
+        except KeyError:
+            raise ValueError(f"Component '{component}' is not recognized.")
+        merged = {**self.default_properties[component], **properties}
+
         if component in ['mirror', 'beamsplitter']:
             if 'reflectivity' in properties and 'transmissivity' in properties:
                 raise ValueError("Cannot specify both 'reflectivity' and 'transmissivity'. Use 'reflectivity' and 'loss' or 'transmissivity' and 'loss' instead.")
             if 'transmissivity' in properties:
-                properties = {**self.default_properties[component], **properties}
-                transmissivity = properties.pop('transmissivity')
-                properties['reflectivity'] = (1 - transmissivity - properties['loss']) / (1 - properties['loss'])
+                transmissivity = merged.pop('transmissivity')
+                merged['reflectivity'] = (1 - transmissivity - merged['loss']) / (1 - merged['loss'])
             elif 'reflectivity' in properties:
-                properties = {**self.default_properties[component], **properties}
-                properties['reflectivity'] = properties['reflectivity'] / (1 - properties['loss'])
-
-        try:
-            properties = {**self.default_properties[component], **properties}
-        except KeyError:
-            raise ValueError(f"Component '{component}' is not recognized.")
+                merged['reflectivity'] = merged['reflectivity'] / (1 - merged['loss'])
+        properties = merged
         
-        if len(properties) != len(self.default_properties[component]):
-            raise ValueError(f"Component '{component}' has the properties {list(self.default_properties[component].keys())} but received {list(properties.keys())}.")
+        if len(properties) != len(default_names):
+            raise ValueError(f"Component '{component}' has the properties {list(default_names)} but received {list(properties.keys())}.")
+        target_property = None
+        if target is not None:
+            # node names contain no underscores, so a single partition separates the node of
+            # a modulated property ("l0_amplitude") or the source and target of a space ("l0_prm")
+            head, sep, tail = target.partition('_')
+            if sep and tail in _TARGET_PROPERTIES:
+                if head not in self._nodes:
+                    raise ValueError(f"Target '{head}' is not in the setup.")
+                target = head
+                target_property = tail
+            elif not (sep and (head, tail) in self._edges) and target not in self._nodes:
+                raise ValueError(f"Target '{target}' is not in the setup.")
+
+        if port is not None and port not in ['left', 'top', 'right', 'bottom']:
+            raise ValueError(f"Port '{port}' is not recognized. Use 'left', 'top', 'right', or 'bottom'.")
+
+        if direction is not None and direction not in ['in', 'out']:
+            raise ValueError(f"Direction '{direction}' is not recognized. Use 'in' or 'out'.")
+
+        if auxiliary is not None and auxiliary not in [True, False]:
+            raise ValueError(f"Auxiliary '{auxiliary}' is not recognized. Use True or False.")
+
+        if detector1 is not None and detector1 not in self._nodes:
+            raise ValueError(f"Detector1 '{detector1}' is not in the setup.")
+
+        if detector2 is not None and detector2 not in self._nodes:
+            raise ValueError(f"Detector2 '{detector2}' is not in the setup.")
+
         if not component == 'signal' and not component == 'frequency' and optimizable:
-            self.parameters.extend([(name, property_name) for property_name in properties.keys()])
+            self.parameters.extend([(name, property_name) for property_name in default_names])
 
-        self._nodes[name] = {
-            'component': component,
-            'properties': properties
-        }
+        # all fields are validated first, so the record is built once and positionally
+        self._nodes[name] = NodeRecord(
+            component, properties, target, target_property, port, direction, auxiliary, detector1, detector2)
 
-        if target is not None:
-            if '_' in target:
-                if target.split('_')[-1] not in ['amplitude', 'frequency']:
-                    try:
-                        self.edges[target]
-                    except KeyError:
-                        raise ValueError(f"Target '{target}' is not in the setup.")
-                    self._nodes[name]['target'] = target
-                else:
-                    try:
-                        self.nodes[target.split('_')[0]]
-                    except KeyError:
-                        raise ValueError(f"Target '{target.split('_')[0]}' is not in the setup.")
-                    self._nodes[name]['target'] = target.split('_')[0]
-                    self._nodes[name]['target_property'] = target.split('_')[-1]
-            else:
-                try:
-                    self.nodes[target]
-                except KeyError:
-                    raise ValueError(f"Target '{target}' is not in the setup.")
-                self._nodes[name]['target'] = target
-
-        if port is not None:
-            if port not in ['left', 'top', 'right', 'bottom']:
-                raise ValueError(f"Port '{port}' is not recognized. Use 'left', 'top', 'right', or 'bottom'.")
-            self._nodes[name]['port'] = port
-
-        if direction is not None:
-            if direction not in ['in', 'out']:
-                raise ValueError(f"Direction '{direction}' is not recognized. Use 'in' or 'out'.")
-            self._nodes[name]['direction'] = direction
-
-        if auxiliary is not None:
-            if auxiliary not in [True, False]:
-                raise ValueError(f"Auxiliary '{auxiliary}' is not recognized. Use True or False.")
-            self._nodes[name]['auxiliary'] = auxiliary
-
-        if detector1 is not None:
-            if detector1 not in self._nodes:
-                raise ValueError(f"Detector1 '{detector1}' is not in the setup.")
-            self._nodes[name]['detector1'] = detector1
-
-        if detector2 is not None:
-            if detector2 not in self._nodes:
-                raise ValueError(f"Detector2 '{detector2}' is not in the setup.")
-            self._nodes[name]['detector2'] = detector2
-
-
-    def space(self, source: str, target: str, optimizable=True, source_port="right", target_port="left", **properties):
-        try:
-            self._nodes[source]
-        except KeyError:
+
+    def space(self, source: str, target: str, optimizable=True, source_port="right", target_port="left", tag=None, **properties):
+        if source not in self._nodes:
             raise ValueError(f"Source node '{source}' is not in the setup.")
-        try:
-            self._nodes[target]
-        except KeyError:
+        if target not in self._nodes:
             raise ValueError(f"Target node '{target}' is not in the setup.")
         
-        if properties is None:
-            properties = {}
-        properties = {**self.default_properties['space'], **properties}
-        if len(properties) != len(self.default_properties['space']):
-            raise ValueError(f"Space has the properties {list(self.default_properties['space'].keys())} but received {list(properties.keys())}.")
+        default_names = self._default_prop_names['space']
+        merged = {**self.default_properties['space'], **properties}
+        properties = merged
+        if len(properties) != len(default_names):
+            raise ValueError(f"Space has the properties {list(default_names)} but received {list(properties.keys())}.")
         if optimizable:
-            self.parameters.extend([(f"{source}_{target}", property_name) for property_name in properties.keys()])
+            name = f"{source}_{target}"
+            self.parameters.extend([(name, property_name) for property_name in default_names])
 
-        self._edges[(source, target)] = {
-            'properties': properties,
-            'source_port': source_port,
-            'target_port': target_port
-        }
+        record = EdgeRecord(properties, source_port, target_port, tag)
+        self._edges[(source, target)] = record
+        self._edge_triples[(source, target)] = (source, target, record)
 
 
 ### Voyager setup
@@ -352,6 +405,8 @@ def uifo(
             S.add("free_mass", f"center{x}{y}sus", target=f"center{x}{y}")
         elif center == "directional_beamsplitter":
             S.add("directional_beamsplitter", f"center{x}{y}")
+        else:
+            raise ValueError(f"Center '{center}' is not recognized. Use 'beamsplitter' or 'directional_beamsplitter'.")
 
         S.add("mirror", f"ml{x}{y}")
         S.add("mirror", f"mr{x}{y}")
@@ -373,7 +428,7 @@ def uifo(
         mirrors = ["ml", "mt", "mr", "mb"]
         for i, port in enumerate(ports[left_port_position]):
             # centers always take the left side of unit cell mirrors
-            S.space(f"center{x}{y}", f"{mirrors[i]}{x}{y}", length=1, source_port=port)    
+            S.space(f"center{x}{y}", f"{mirrors[i]}{x}{y}", length=1, source_port=port, tag=("center", None))    
 
         # phase 180 for signals on vertical spaces
         S.add("signal", f"scenter{x}{y}ml{x}{y}", target=f"center{x}{y}_ml{x}{y}", phase = 180 if left_port_position in ["top", "bottom"] else 0)
@@ -393,7 +448,7 @@ def uifo(
             S.add("qnoised", f"boundary{x}{y}noise", target=f"m{x}{y}", port="left", direction="out")
         elif boundary in ["laser", "squeezer"]:
             S.add(boundary, f"boundary{x}{y}")
-            S.space(f"boundary{x}{y}", f"m{x}{y}")
+            S.space(f"boundary{x}{y}", f"m{x}{y}", tag=("boundary", None))
             # phase 180 for signals on vertical spaces
             S.add("signal", f"sboundary{x}{y}m{x}{y}", target=f"boundary{x}{y}_m{x}{y}", phase=180 if position in ["top", "bottom"] else 0)
 
@@ -408,12 +463,12 @@ def uifo(
             for y in range(1, n+1):
                 if x > 1:
                     # right ports because left ports are taken by center
-                    S.space(f"mt{x}{y}", f"mb{x-1}{y}", source_port="right", target_port="right")
+                    S.space(f"mt{x}{y}", f"mb{x-1}{y}", source_port="right", target_port="right", tag=("vspace", x))
                     # signals on vertical spaces
                     S.add("signal", f"smt{x}{y}mb{x-1}{y}", target=f"mt{x}{y}_mb{x-1}{y}", phase=180)
                 if y > 1:
                     # right ports because left ports are taken by center
-                    S.space(f"mr{x}{y-1}", f"ml{x}{y}", source_port="right", target_port="right")
+                    S.space(f"mr{x}{y-1}", f"ml{x}{y}", source_port="right", target_port="right", tag=("hspace", y-1))
                     # signals on horizontal spaces
                     S.add("signal", f"smr{x}{y-1}ml{x}{y}", target=f"mr{x}{y-1}_ml{x}{y}")
 
@@ -449,41 +504,87 @@ def uifo(
     return S, S.parameters
 
 
+# property name -> integer code, with the lower and upper bounds as arrays indexed by that code
+_PROPERTY_CODES = {property_name: code for code, property_name in enumerate(PARAMETER_BOUNDS)}
+_LOWER_BOUNDS = np.fromiter((PARAMETER_BOUNDS[property_name][0] for property_name in _PROPERTY_CODES), dtype=np.float64)
+_UPPER_BOUNDS = np.fromiter((PARAMETER_BOUNDS[property_name][1] for property_name in _PROPERTY_CODES), dtype=np.float64)
+
+
+def _apply_sigmoid_bounds(x: np.ndarray, lower: np.ndarray, upper: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    NumPy version of sigmoid_bounding that works in place on flat float64 arrays, 
+    avoiding the JAX dispatch and device transfer for a one-off host-side computation.
+    """
+    np.negative(x, out=out)
+    np.exp(out, out=out)
+    out += 1
+    np.reciprocal(out, out=out)
+    out *= upper - lower
+    out += lower
+    return out
+
+
 def initialize_parameters_randomly(setup: Setup, component_parameter_pairs: list, uniform_bound: int = 10):
-    bounds = np.array([[PARAMETER_BOUNDS[property_name][0] for (_, property_name) in component_parameter_pairs], 
-                       [PARAMETER_BOUNDS[property_name][1] for (_, property_name) in component_parameter_pairs]])
-    parameters = np.array(np.random.uniform(-uniform_bound, uniform_bound, len(component_parameter_pairs)))
-    parameters = sigmoid_bounding(parameters, bounds)
+    codes = np.fromiter((_PROPERTY_CODES[property_name] for (_, property_name) in component_parameter_pairs), 
+                        dtype=np.int32, count=len(component_parameter_pairs))
+    lower = _LOWER_BOUNDS[codes]
+    upper = _UPPER_BOUNDS[codes]
+    parameters = np.random.uniform(-uniform_bound, uniform_bound, len(component_parameter_pairs))
+    parameters = _apply_sigmoid_bounds(parameters, lower, upper, out=np.empty_like(parameters))
 
-    for (node, property_name), value in zip(component_parameter_pairs, parameters):
-        set_value(node, property_name, float(value), setup)
+    for (node, property_name), value in zip(component_parameter_pairs, parameters.tolist()):
+        set_value(node, property_name, value, setup)
 
 
-def constrain_inter_grid_cell_spaces(component_property_pairs, optimized_properties):
+def _uifo_space_tag(component_name: str) -> tuple:
+    """
+    Legacy fallback that recovers the UIFO kind and grid index of a space by parsing its name. 
+    It reads single digits from the name, so it is only correct for grids smaller than 10x10;
+    pass the setup to constrain_inter_grid_cell_spaces() to use the stored tags instead.
+    """
+    if "center" in component_name:
+        return "center", None
+    elif "boundary" in component_name:
+        return "boundary", None
+    elif "mr" in component_name and "_ml" in component_name:
+        return "hspace", int(component_name.split('_')[0][-1])
+    elif "mt" in component_name and "_mb" in component_name:
+        return "vspace", int(component_name.split('_')[0][-2])
+    return "other", None
+
+
+def constrain_inter_grid_cell_spaces(component_property_pairs, optimized_properties, setup: Setup = None):
     """
-    Spaces within a grid cell and in boundary cells are not optimized.
+    Spaces within a grid cell and in boundary cells are not optimized. Horizontal and vertical 
+    spaces between grid cells are shared per grid column and row respectively. Pass the UIFO setup
+    to group the spaces by the tags that uifo() stores on them; without it, the kinds are parsed
+    from the space names (legacy, only correct for grids smaller than 10x10).
     """
-    component_property_pairs = [[component_name, property_name] for component_name, property_name in component_property_pairs if property_name in optimized_properties]
+    if setup is not None:
+        tags = {f"{source}_{target}": data.tag for source, target, data in setup.edges(data=True) if data.tag is not None}
+        get_tag = lambda component_name: tags.get(component_name, ("other", None))
+    else:
+        get_tag = _uifo_space_tag
 
     constrained_pairs = []
     # horizontal spaces and vertical spaces
-    constrained_pair_dicts = [defaultdict(list), defaultdict(list)]
+    constrained_pair_dicts = {"hspace": defaultdict(list), "vspace": defaultdict(list)}
     for component_name, property_name in component_property_pairs:
+        if property_name not in optimized_properties:
+            continue
         if property_name == "length":
-            if "center" in component_name or "boundary" in component_name:
+            kind, index = get_tag(component_name)
+            if kind == "center" or kind == "boundary":
                 continue
-            elif "mr" in component_name and "_ml" in component_name:
-                constrained_pair_dicts[0][component_name.split('_')[0][-1]].append([component_name, property_name])
-            elif "mt" in component_name and "_mb" in component_name:
-                constrained_pair_dicts[1][component_name.split('_')[0][-2]].append([component_name, property_name])
+            elif kind in constrained_pair_dicts:
+                constrained_pair_dicts[kind][index].append([component_name, property_name])
             else:
                 constrained_pairs.append([component_name, property_name])
         else:
             constrained_pairs.append([component_name, property_name])
-    for constrained_pair_dict in constrained_pair_dicts:
-        constrained_pairs.extend([constrained_pair_dict[key] for key in constrained_pair_dict])
+    for constrained_pair_dict in constrained_pair_dicts.values():
+        constrained_pairs.extend(constrained_pair_dict.values())
 
-    constrained_pairs = [parameter for parameter in constrained_pairs if parameter]
     constrained_pairs = [parameter[0] if len(parameter) == 1 else parameter for parameter in constrained_pairs]
     return constrained_pairs
 
@@ -491,92 +592,136 @@ def constrain_inter_grid_cell_spaces(component_property_pairs, optimized_propert
 ### Finesse Conversions
 
 
-def differometor_to_finesse(setup: Setup) -> str:
-    finesse = ""
-
-    port_translation = {
-        "mirror": {
-            "left": "p1",
-            "right": "p2"
-        },
-        "laser": {
-            "left": "p1",
-            "right": "p1"
-        },
-        "squeezer": {
-            "left": "p1",
-            "right": "p1"
-        },
-        "beamsplitter": {
-            "left": "p1",
-            "top": "p2",
-            "right": "p3",
-            "bottom": "p4"
-        },
-        "directional_beamsplitter": {
-            "left": "p1",
-            "top": "p2",
-            "right": "p3",
-            "bottom": "p4"
-        },
-        "nothing": {
-            "left": "p1",
-            "right": "p2"
-        }
+FINESSE_PORT_TRANSLATION = {
+    "mirror": {
+        "left": "p1",
+        "right": "p2"
+    },
+    "laser": {
+        "left": "p1",
+        "right": "p1"
+    },
+    "squeezer": {
+        "left": "p1",
+        "right": "p1"
+    },
+    "beamsplitter": {
+        "left": "p1",
+        "top": "p2",
+        "right": "p3",
+        "bottom": "p4"
+    },
+    "directional_beamsplitter": {
+        "left": "p1",
+        "top": "p2",
+        "right": "p3",
+        "bottom": "p4"
+    },
+    "nothing": {
+        "left": "p1",
+        "right": "p2"
     }
+}
+
+FINESSE_DIRECTION_TRANSLATION = {
+    "in": "i",
+    "out": "o"
+}
+
+# flat (component, port) -> finesse port lookup, built once at import
+_FINESSE_PORTS = {
+    (component, port): finesse_port 
+    for component, ports in FINESSE_PORT_TRANSLATION.items() 
+    for port, finesse_port in ports.items()
+}
+
+
+def _emit_frequency(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    return f"fsig({properties['frequency']})"
+
+
+def _emit_laser(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    return f"l {node} P={properties['power']} phase={properties['phase']}"
 
-    direction_translation = {
-        "in": "i",
-        "out": "o"
-    }
+
+def _emit_squeezer(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    return f"sq {node} db={properties['db']} angle={properties['angle']}"
+
+
+def _emit_mirror(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    l = properties['loss']
+    r = properties['reflectivity'] * (1 - l)
+    t = 1 - r - l
+    return f"m {node} R={r} T={t} L={l} phi={properties['tuning']}"
+
+
+def _emit_beamsplitter(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    l = properties['loss']
+    r = properties['reflectivity'] * (1 - l)
+    t = 1 - r - l
+    return f"bs {node} R={r} T={t} L={l} phi={properties['tuning']} alpha={properties['alpha']}"
+
+
+def _emit_free_mass(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    return f"free_mass {node} {data.target}.mech mass={properties['mass']}"
+
+
+def _emit_signal(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    if data.target_property == "frequency":
+        return f"sgen {node} {data.target}.frq.i amplitude={properties['amplitude']} phase={properties['phase']}"
+    elif data.target_property == "amplitude":
+        return f"sgen {node} {data.target}.amp.i amplitude=sqrt({data.target}.P) phase={properties['phase']}"
+    return f"sgen {node} {data.target}.h amplitude={properties['amplitude']} phase={properties['phase']}"
+
+
+def _emit_qnoised(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    port = _FINESSE_PORTS[(setup.nodes[data.target].component, data.port)]
+    direction = FINESSE_DIRECTION_TRANSLATION[data.direction]
+    return f"qnoised {node} {data.target}.{port}.{direction}"
+
+
+def _emit_directional_beamsplitter(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    return f"dbs {node}"
+
+
+def _emit_nothing(node: str, data: NodeRecord, properties: dict, setup: Setup) -> str:
+    return f"nothing {node}"
+
+
+# component -> finesse line; components without an entry (e.g. detector, qhd) are not exported
+_FINESSE_EMITTERS = {
+    "frequency": _emit_frequency,
+    "laser": _emit_laser,
+    "squeezer": _emit_squeezer,
+    "mirror": _emit_mirror,
+    "beamsplitter": _emit_beamsplitter,
+    "free_mass": _emit_free_mass,
+    "signal": _emit_signal,
+    "qnoised": _emit_qnoised,
+    "directional_beamsplitter": _emit_directional_beamsplitter,
+    "nothing": _emit_nothing,
+}
+
+
+def differometor_to_finesse(setup: Setup) -> str:
+    parts = []
 
     for node, data in setup.nodes(data=True):
         try:
-            property_dict = DEFAULT_PROPERTIES[data["component"]].copy()
+            property_dict = {**DEFAULT_PROPERTIES[data.component], **data.properties}
         except KeyError:
             print("KeyError for :", node, data)
-        property_dict.update(data.get("properties", {}))
         
-        if data["component"] == "frequency":
-            finesse += f"fsig({property_dict['frequency']})\n"
-        elif data["component"] == "laser":
-            finesse += f"l {node} P={property_dict['power']} phase={property_dict['phase']}\n"
-        elif data["component"] == "squeezer":
-            finesse += f"sq {node} db={property_dict['db']} angle={property_dict['angle']}\n"
-        elif data["component"] == "mirror":
-            l = property_dict['loss']
-            r = property_dict['reflectivity'] * (1 - l)
-            t = 1 - r - l
-            finesse += f"m {node} R={r} T={t} L={l} phi={property_dict['tuning']}\n"
-        elif data["component"] == "beamsplitter":
-            l = property_dict['loss']
-            r = property_dict['reflectivity'] * (1 - l)
-            t = 1 - r - l
-            finesse += f"bs {node} R={r} T={t} L={l} phi={property_dict['tuning']} alpha={property_dict['alpha']}\n"
-        elif data["component"] == "free_mass":
-            finesse += f"free_mass {node} {data['target']}.mech mass={property_dict['mass']}\n"
-        elif data["component"] == "signal":
-            if "target_property" in data and data["target_property"] == "frequency":
-                finesse += f"sgen {node} {data['target']}.frq.i amplitude={property_dict['amplitude']} phase={property_dict['phase']}\n"
-            elif "target_property" in data and data["target_property"] == "amplitude":
-                finesse += f"sgen {node} {data['target']}.amp.i amplitude=sqrt({data['target']}.P) phase={property_dict['phase']}\n"
-            else:
-                finesse += f"sgen {node} {data['target']}.h amplitude={property_dict['amplitude']} phase={property_dict['phase']}\n"
-        elif data["component"] == "qnoised":
-            port = port_translation[setup.nodes[data["target"]]["component"]][data["port"]]
-            direction = direction_translation[data["direction"]]
-            finesse += f"qnoised {node} {data['target']}.{port}.{direction}\n"
-        elif data["component"] == "directional_beamsplitter":
-            finesse += f"dbs {node}\n"
-        elif data["component"] == "nothing":
-            finesse += f"nothing {node}\n"
+        emitter = _FINESSE_EMITTERS.get(data.component)
+        if emitter is not None:
+            parts.append(emitter(node, data, property_dict, setup))
         
-    finesse += "\n"
+    # blank line between components and spaces
+    parts.append("")
+    space_defaults = DEFAULT_PROPERTIES["space"]
     for source, target, data in setup.edges(data=True):
-        property_dict = DEFAULT_PROPERTIES["space"].copy()
-        property_dict.update(data.get("properties", {}))
-        source_port = port_translation[setup.nodes[source]["component"]][data.get("source_port", "right")]
-        target_port = port_translation[setup.nodes[target]["component"]][data.get("target_port", "left")]
-        direction = direction_translation[data.get("direction", "out")]
-        finesse += f"s {source}_{target} {source}.{source_port} {target}.{target_port} L={property_dict['length']} nr={property_dict['refractive_index']}\n"
-    return finesse
\ No newline at end of file
+        property_dict = {**space_defaults, **data.properties}
+        source_port = _FINESSE_PORTS[(setup.nodes[source].component, data.source_port)]
+        target_port = _FINESSE_PORTS[(setup.nodes[target].component, data.target_port)]
+        parts.append(f"s {source}_{target} {source}.{source_port} {target}.{target_port} L={property_dict['length']} nr={property_dict['refractive_index']}")
+    return "\n".join(parts) + "\n"
\ No newline at end of file
@@ -17,16 +17,9 @@ def set_value(
         setup
     ):
     if not '_' in node:
-        try:
-            setup.nodes[node]["properties"][property_name] = value
-        except KeyError:
-            setup.nodes[node]["properties"] = {property_name: value}
+        setup.nodes[node].properties[property_name] = value
     else:
-        source, target = node.split('_')
-        try:
-            setup.edges[source + '_' + target]["properties"][property_name] = value
-        except KeyError:
-            setup.edges[source + '_' + target]["properties"] = {property_name: value}
+        setup.edges[node].properties[property_name] = value
 
 
 def update_setup(
@@ -0,0 +1,45 @@
+import copy
+import pickle
+from differometor.setups import voyager, uifo, constrain_inter_grid_cell_spaces
+
+
+def test_setups_can_be_copied_and_pickled():
+    for S in [voyager()[0], uifo(2)[0]]:
+        copied = copy.deepcopy(S)
+        restored = pickle.loads(pickle.dumps(S))
+        for other in [copied, restored]:
+            assert list(other.nodes(data=False)) == list(S.nodes(data=False))
+            assert other.nodes["f"].properties == S.nodes["f"].properties
+            assert other.parameters == S.parameters
+
+
+def test_properties_of_default_components_are_independent():
+    S, _ = uifo(2)
+    S.nodes["ml11"]["properties"]["tuning"] = 5
+    S.edges["mt21_mb11"]["properties"]["length"] = 3
+    assert S.nodes["ml11"].properties["tuning"] == 5
+    assert S.nodes["mr11"].properties["tuning"] == 0.
+    assert S.edges["mt21_mb11"].properties["length"] == 3
+    assert S.edges["mt22_mb12"].properties["length"] == 0
+
+
+def test_uifo_parameters_follow_per_cell_order():
+    _, parameters = uifo(1)
+    owners = list(dict.fromkeys(name for name, _ in parameters))
+    assert owners[:10] == ["center11", "center11sus", "ml11", "mr11", "mt11", "mb11", 
+                           "ml11sus", "mr11sus", "mt11sus", "mb11sus"]
+    assert owners[10:14] == ["center11_ml11", "center11_mt11", "center11_mr11", "center11_mb11"]
+    assert owners[14:18] == ["m10", "m10sus", "boundary10", "boundary10_m10"]
+
+
+def test_constrain_with_setup_tags_matches_name_parsing():
+    setups = {
+        3: uifo(3), 
+        5: uifo(5, centers={(2, 2): ("directional_beamsplitter", "top")}, boundaries={(0, 3): "detector"})
+    }
+    for size, (S, parameters) in setups.items():
+        by_tags = constrain_inter_grid_cell_spaces(parameters, ["length", "reflectivity"], setup=S)
+        by_names = constrain_inter_grid_cell_spaces(parameters, ["length", "reflectivity"])
+        assert by_tags == by_names
+        assert [[f"mr{x}1_ml{x}2", "length"] for x in range(1, size+1)] in by_tags
+        assert ["center11_ml11", "length"] not in by_tags